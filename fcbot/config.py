@@ -12,6 +12,9 @@ import yaml
 from pydantic import BaseModel, Field
 from typing import Any, Optional, Literal, Union
 
+#: Prefer the libyaml-backed safe loader when PyYAML was built with it
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class FCBotConfigMeta(BaseModel):
     """Schema for FCBot Metadata Configuration."""
@@ -20,6 +23,7 @@ class FCBotConfigMeta(BaseModel):
     output_dir: Optional[str] = None
     log_level: str = 'INFO'
     paths: Optional[list[str]] = None
+    timeout: Optional[int] = None
     version: Optional[int] = None
 
 
@@ -45,6 +49,8 @@ class FCBotConfigOutput(BaseModel):
     `comment`: Longer comment for this output step, logged once prior to running
                the output step.
     `options`: Extra options specific to the output type.
+    `tmp_dir`: Scratch directory for intermediate export files. Defaults to
+               a RAM-backed filesystem when available.
     """
     output_type: str = Field(alias='type')
     filename: str
@@ -56,6 +62,7 @@ class FCBotConfigOutput(BaseModel):
     name: Optional[str] = None
     comment: Optional[str] = None
     options: Optional[dict[str, Any]] = None
+    tmp_dir: Optional[str] = None
 
 
 class FCBotConfig(BaseModel):
@@ -69,7 +76,7 @@ def load_config(filename: str) -> FCBotConfig | None:
     with open(filename, 'r') as f:
         try:
             logging.debug(f'Loading configuration from {filename}')
-            config_data = yaml.load(f, yaml.Loader)
+            config_data = yaml.load(f, Loader=Loader)
 
         except Exception as exc:
             logging.error(f'Failed to read configuration file: {exc}')
@@ -26,12 +26,38 @@ COLORS = {
     logging.CRITICAL: BOLD_RED,
 }
 
+#: Precomputed (color, reset) pairs so format() does a single dict lookup
+_LEVEL_COLOR = { lvl: (color, RESET) for lvl, color in COLORS.items() }
+
 class PackageInjectorMixin(object):
     """Inject the Python Package Dotted Path into the logger record.
 
     Implements caching by creating a `_package_cache` attribute on the LogFormatter
-    object and indexing on file path.
+    object and indexing on file path. The absolute `sys.path` entries are also
+    cached (sorted longest-first so the most specific path wins) and refreshed
+    whenever `sys.path` is replaced or changes length.
     """
+    #: Cached absolute `sys.path` entries, keyed on `(id(sys.path), len(sys.path))`
+    _sys_path_cache: tuple[tuple[int, int], list[str]] | None = None
+
+    def _absSysPath(self) -> list[str]:
+        """Return absolute `sys.path` entries, sorted longest-first.
+
+        Entries carry a trailing separator so the per-record loop is a bare
+        `str.startswith` with no concatenation.
+        """
+        cache_key = (id(sys.path), len(sys.path))
+        cached = PackageInjectorMixin._sys_path_cache
+        if cached is None or cached[0] != cache_key:
+            abs_paths = sorted(
+                { os.path.abspath(p) + os.sep for p in sys.path },
+                key=len, reverse=True,
+            )
+            PackageInjectorMixin._sys_path_cache = (cache_key, abs_paths)
+            return abs_paths
+
+        return cached[1]
+
     def _injectPackage(self, record: logging.LogRecord) -> logging.LogRecord:
 
         # Initialize the Cache
@@ -51,10 +77,9 @@ class PackageInjectorMixin(object):
         # Find the path of this file relative to some search path
         abs_pathname = os.path.abspath(record.pathname)
         rel_pathname = None
-        for import_path in sys.path:
-            abs_imp_path = os.path.abspath(import_path)
-            if os.path.commonpath([abs_imp_path, abs_pathname]) == abs_imp_path:
-                rel_pathname = os.path.relpath(abs_pathname, abs_imp_path)
+        for abs_imp_path in self._absSysPath():
+            if abs_pathname.startswith(abs_imp_path):
+                rel_pathname = abs_pathname[len(abs_imp_path):]
                 break
 
         # If there is no search path that leads to this file, it's not a package
@@ -62,8 +87,11 @@ class PackageInjectorMixin(object):
             record.package = None
             return record
 
-        # Store the package as a dotted-path
-        record.package = os.path.dirname(rel_pathname).replace('/', '.')
+        # Store the package as a dotted-path; rpartition leaves '' for
+        # top-level modules and the intern keeps repeated packages sharing
+        # one string object
+        package = rel_pathname.rpartition(os.sep)[0].replace(os.sep, '.')
+        record.package = sys.intern(package)
         self._package_cache[record.pathname] = record.package
 
         return record
@@ -73,7 +101,14 @@ class FCBotLogFormatter(logging.Formatter, PackageInjectorMixin):
     """FreeCAD Bot Logging Formatter.
     
     Render color log messages that include the full module dotted path.
+
+    Records below `min_level` are formatted as their bare message, skipping
+    package injection and colorization entirely.
     """
+    def __init__(self, *args, min_level: int = logging.NOTSET, **kwargs):
+        super(FCBotLogFormatter, self).__init__(*args, **kwargs)
+        self._min_level = min_level
+
     def format(self, record):
         '''
         Format the specified record as text.
@@ -88,9 +123,11 @@ class FCBotLogFormatter(logging.Formatter, PackageInjectorMixin):
         :meth:`python:logging.LogRecord.formatTime` is called to format the
         event time.
         '''
+        if record.levelno < self._min_level:
+            return record.getMessage()
+
         record = self._injectPackage(record)
-        record.color = COLORS.get(record.levelno, GREY)
-        record.color_reset = RESET
+        record.color, record.color_reset = _LEVEL_COLOR.get(record.levelno, (GREY, RESET))
 
         return super(FCBotLogFormatter, self).format(record)
 
@@ -102,7 +139,10 @@ def init_logging(level: int|str) -> logging.Logger:
 
     handler = logging.StreamHandler(sys.stderr)
     handler.setLevel(level)
-    handler.setFormatter(FCBotLogFormatter(DEFAULT_FORMAT))
+    handler.setFormatter(FCBotLogFormatter(
+        DEFAULT_FORMAT,
+        min_level=level if isinstance(level, int) else logging.getLevelNamesMapping().get(level, logging.NOTSET),
+    ))
 
     logger.addHandler(handler)
     logger.debug('Logging Initialized')
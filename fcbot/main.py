@@ -16,7 +16,7 @@ import tempfile
 import jinja2
 import yaml
 
-from dataclasses import asdict, field, dataclass
+from dataclasses import dataclass
 from typing import Tuple
 
 from fcbot.config import load_config
@@ -26,6 +26,17 @@ __NAME__ = 'FCBot'
 __PACKAGE__ = 'fcbot'
 __VERSION__ = '0.2.1'
 
+_LOGGER = logging.getLogger(__name__)
+
+#: Recognized values for the "fcbot.log_level" configuration key
+_VALID_LEVELS = frozenset(logging.getLevelNamesMapping())
+
+#: Directory containing the fcbot package, resolved once at module load
+_PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+#: Absolute interpreter prefix, resolved once at module load
+_ABS_PREFIX = os.path.abspath(sys.prefix)
+
 
 @dataclass
 class Context:
@@ -42,6 +53,16 @@ def quote(input: str) -> str:
     return repr(str(input))
 
 
+#: Script template environment, compiled once at module load
+_ENV = jinja2.Environment(
+    loader=jinja2.PackageLoader('fcbot'),
+    auto_reload=False,
+    cache_size=-1,
+)
+_ENV.filters['quote'] = quote
+_TMPL = _ENV.get_template('script.py.j2')
+
+
 def main():
     """FCBot Main Entry Point."""
     parser = argparse.ArgumentParser(
@@ -94,22 +115,24 @@ def main():
     logger.info('FCBot Started')
 
     # Load Package Directory
-    package_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    logger.debug(f'FCBot Package found at {package_dir}')
+    package_dir = _PACKAGE_DIR
+    _LOGGER.debug('FCBot Package found at %s', package_dir)
 
     # Check for Virtual Environment (needed for custom packages)
     venv_dir = None
     if sys.prefix != sys.base_prefix:
-        logger.debug(f'Virtual Environment found at {sys.prefix}')
+        _LOGGER.debug('Virtual Environment found at %s', sys.prefix)
+        prefix = _ABS_PREFIX + os.sep
         for path in sys.path:
-            if os.path.commonpath([sys.prefix, path]) == sys.prefix and 'site-packages' in path:
+            if path.startswith(prefix) and 'site-packages' in path:
                 venv_dir = path
+                break
 
-        logger.debug(f'Virtual Environment site-packages found at {venv_dir}')
+        _LOGGER.debug('Virtual Environment site-packages found at %s', venv_dir)
 
     # Load Configuration File
     if not os.path.exists(args.config):
-        logger.error(f'Configuration file {args.config} not found')
+        _LOGGER.error('Configuration file %s not found', args.config)
         sys.exit(1)
 
     config = load_config(args.config)
@@ -120,16 +143,16 @@ def main():
     # TODO: This is really hacky and should really be handled differently
     if config.fcbot.output_dir is None and args.output is not None:
         config.fcbot.output_dir = args.output
-    logging.debug(f'Using output directory {config.fcbot.output_dir}')
+    _LOGGER.debug('Using output directory %s', config.fcbot.output_dir)
 
     # Check Logging Configuration
-    if config.fcbot.log_level not in logging.getLevelNamesMapping():
-        logger.error(f'Invalid value for "fcbot.log_level": {config.fcbot.log_level}')
+    if config.fcbot.log_level not in _VALID_LEVELS:
+        _LOGGER.error('Invalid value for "fcbot.log_level": %s', config.fcbot.log_level)
         sys.exit(3)
 
     # Process Output Configurations
     if not config.outputs:
-        logger.warning(f'No Outputs found in configuration file, exiting cleanly')
+        _LOGGER.warning('No Outputs found in configuration file, exiting cleanly')
         sys.exit(0)
 
     outputs = []
@@ -152,26 +175,24 @@ def main():
         outputs=outputs,
     )
 
-    # Render the Jinja Template
-    env = jinja2.Environment(loader=jinja2.PackageLoader('fcbot'))
-    env.filters['quote'] = quote
-
-    tmpl = env.get_template('script.py.j2')
-    script = tmpl.render(config=config, **asdict(context))
+    # Render the Jinja Template. vars() is a shallow view of the dataclass
+    # fields; asdict() would deep-copy the OutputRunner list, which Jinja
+    # only needs to read attributes from.
+    script = _TMPL.render(config=config, **vars(context))
 
     # Write to a temp file and run FreeCAD
     with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as script_file:
-        logging.debug(f'Writing script file to {script_file.name}')
+        _LOGGER.debug('Writing script file to %s', script_file.name)
         script_file.write(script)
-        script_file.close()
 
-        if not os.path.exists(script_file.name):
-            logging.error(f'Script file {script_file.name} disappeared')
-            sys.exit(4)
+    try:
+        try:
+            if not os.stat(script_file.name).st_size:
+                _LOGGER.error('Script file %s is empty after writing', script_file.name)
+                sys.exit(4)
 
-        if not os.stat(script_file.name).st_size:
-            logging.error(f'Script file {script_file.name} is empty after writing')
-            os.unlink(script_file.name)
+        except OSError:
+            _LOGGER.error('Script file %s disappeared', script_file.name)
             sys.exit(4)
 
         fc_cmd = [ config.fcbot.freecad_cmd ]
@@ -182,11 +203,28 @@ def main():
 
         fc_cmd.append(script_file.name)
 
-        logging.info(f'Starting FreeCAD with "{ fc_cmd[0] }"')
-        logging.debug(f'Full FreeCAD command: {" ".join(fc_cmd)}')
-        subprocess.run(fc_cmd, timeout=60)
+        _LOGGER.info('Starting FreeCAD with "%s"', fc_cmd[0])
+        _LOGGER.isEnabledFor(logging.DEBUG) and _LOGGER.debug('Full FreeCAD command: %s', ' '.join(fc_cmd))
+
+        proc = subprocess.Popen(fc_cmd)
+        try:
+            proc.wait(timeout=config.fcbot.timeout)
 
-        logging.debug(f'Removing script file {script_file.name}')
-        os.unlink(script_file.name)
+        except subprocess.TimeoutExpired:
+            _LOGGER.error('FreeCAD did not finish within %d seconds', config.fcbot.timeout)
+            proc.kill()
+            proc.wait()
+            sys.exit(5)
+
+        if proc.returncode:
+            _LOGGER.error('FreeCAD exited with status %d', proc.returncode)
+            sys.exit(5)
+
+    finally:
+        _LOGGER.debug('Removing script file %s', script_file.name)
+        try:
+            os.unlink(script_file.name)
+        except OSError:
+            pass
 
-    logging.info(f'FCBot Run Complete')
+    _LOGGER.info('FCBot Run Complete')
@@ -4,7 +4,10 @@ Copyright (c) 2025 Asymworks, LLC.
 All Rights Reserved.
 """
 
+import concurrent.futures
+import functools
 import json
+import os
 
 from typing import Optional
 
@@ -23,6 +26,16 @@ OUTPUT_CLASSES = {
     'screenshot': ScreenshotOutputRunner,
 }
 
+@functools.lru_cache(maxsize=128)
+def _validate_output_json(config_json: str) -> FCBotConfigOutput:
+    """Validate a JSON configuration block, memoized by JSON string.
+
+    The runner script emitted for FreeCAD reconstructs each runner from its
+    JSON configuration; memoizing here avoids re-running Pydantic validation
+    when the same configuration is loaded more than once.
+    """
+    return FCBotConfigOutput.model_validate_json(config_json)
+
 def load_runner(
     config: FCBotConfigOutput,
     default_name: str,
@@ -49,5 +62,35 @@ def load_runner_json(
     base_dir: Optional[str]
 ) -> OutputRunner:
     """Load an Output Runner from a JSON configuration block."""
-    config = FCBotConfigOutput.model_validate_json(config_json)
+    config = _validate_output_json(config_json)
     return load_runner(config, default_name, base_dir=base_dir)
+
+def run_runners(doc: 'App.Document', runners: list[OutputRunner]) -> None:
+    """Run a list of Output Runners against a document.
+
+    Runners marked `parallel_safe` are fanned out to a thread pool (their
+    exporters release the GIL during serialization); runners that touch the
+    process-global FreeCAD GUI context run serially afterwards, in their
+    configured order. Screenshots in particular must never race `runCommand`
+    against each other.
+    """
+    parallel = [ r for r in runners if r.parallel_safe ]
+    serial = [ r for r in runners if not r.parallel_safe ]
+
+    if len(parallel) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            for future in [ pool.submit(r.run, doc) for r in parallel ]:
+                future.result()
+    else:
+        # Nothing to gain from the pool; keep the configured order
+        serial = runners
+
+    for runner in serial:
+        runner.run(doc)
+
+def finalize_runners() -> None:
+    """Release shared resources held by output runners.
+
+    Called by the generated runner script once all outputs have completed.
+    """
+    ScreenshotOutputRunner.finalize()
@@ -4,14 +4,43 @@ Copyright (c) 2025 Asymworks, LLC.
 All Rights Reserved.
 """
 
+import functools
 import json
 import os
 import logging
+import stat
 
 from typing import Any, Optional
 
 from fcbot.config import FCBotAllPages, FCBotAllShapes, FCBotConfigOutput
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+#: Per-type cache of `Part::PropertyPartShape` support. FreeCAD proxy types
+#: report the same supportedProperties set across instances, so one probe
+#: per type replaces a C++ attribute crossing per object. The cache is
+#: module-level and shared by every runner type, so when the same items feed
+#: several runners (e.g. a STEP export and a screenshot of the same shapes)
+#: the check is not repeated per runner. Proxy types survive a document
+#: reload unchanged, so no invalidation hook is needed.
+_part_shape_types: dict[type, bool] = {}
+
+def supportsPartShape(item: object) -> bool:
+    """Check whether an object supports `Part::PropertyPartShape`."""
+    itype = type(item)
+    cached = _part_shape_types.get(itype)
+    if cached is None:
+        supported = getattr(item, 'supportedProperties', None)
+        cached = supported is not None and 'Part::PropertyPartShape' in supported()
+        _part_shape_types[itype] = cached
+
+    return cached
+
 
 class OutputRunner(object):
     """Base Class for FCBot Output Runners.
@@ -23,9 +52,18 @@ class OutputRunner(object):
           to use a quasi-global object that holds other things from the `fcbot`
           configuration (and/or command line).
     """
-    def __init__(self, config: dict[str, Any], *, base_dir: Optional[str] = None):
+    #: Whether this runner may run concurrently with other runners. Only
+    #: set for exporters that do not touch the process-global FreeCAD GUI
+    #: context and release the GIL during export.
+    parallel_safe = False
+
+    def __init__(self, config: dict[str, Any] | FCBotConfigOutput, *, base_dir: Optional[str] = None):
         self._base_dir = base_dir
-        self._config = FCBotConfigOutput.model_validate(config)
+        self._abs_base_dir = os.path.abspath(base_dir) if base_dir else None
+        if isinstance(config, FCBotConfigOutput):
+            self._config = config
+        else:
+            self._config = FCBotConfigOutput.model_validate(config)
         if self._config.options:
             self._options = self._loadOptions(self._config.options)
 
@@ -45,6 +83,21 @@ class OutputRunner(object):
         """Load Output-Type Specific Options."""
         pass
 
+    def _resolveTmpDir(self) -> str | None:
+        """Resolve the scratch directory for intermediate export files.
+
+        Uses the `tmp_dir` output configuration key when set, otherwise
+        prefers RAM-backed `/dev/shm` when present and writable, and finally
+        falls back to the system default temp directory (`None`).
+        """
+        if self._config.tmp_dir:
+            return self._config.tmp_dir
+
+        if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+            return '/dev/shm'
+
+        return None
+
     def checkOutputFile(self, filename: str) -> str | None:
         """Check that an Output File should be writable.
 
@@ -52,22 +105,29 @@ class OutputRunner(object):
         the file will not be writable (i.e. it exists as a directory already),
         `None` is returned.
         """
-        if self._base_dir:
-            abs_fn = os.path.abspath(os.path.join(self._base_dir, filename))
+        if self._abs_base_dir:
+            # The base directory is already absolute so joining is sufficient
+            abs_fn = os.path.normpath(os.path.join(self._abs_base_dir, filename))
         else:
             abs_fn = os.path.abspath(filename)
 
         out_dir = os.path.dirname(abs_fn)
         if not os.path.exists(out_dir):
-            logging.info(f'<{self.name}> Output directory {out_dir} does not exist and will be created')
+            _LOGGER.info('<%s> Output directory %s does not exist and will be created', self.name, out_dir)
             os.makedirs(out_dir, exist_ok=True)
 
-        if os.path.exists(abs_fn) and not os.path.isfile(abs_fn):
-            logging.error(f'<{self.name}> Output file {abs_fn} is not a file')
-            return None
+        # A single stat() replaces the exists/isfile checks
+        try:
+            st = os.stat(abs_fn)
+        except OSError:
+            st = None
+
+        if st is not None:
+            if not stat.S_ISREG(st.st_mode):
+                _LOGGER.error('<%s> Output file %s is not a file', self.name, abs_fn)
+                return None
 
-        elif os.path.exists(abs_fn):
-            logging.warning(f'<{self.name}> Output file {abs_fn} exists and will be overwritten')
+            _LOGGER.warning('<%s> Output file %s exists and will be overwritten', self.name, abs_fn)
 
         return abs_fn
 
@@ -85,18 +145,24 @@ class OutputRunner(object):
         slabels = set()
         items = []
 
+        # Index the document once rather than scanning it per label with
+        # doc.getObjectsByLabel
+        by_label: dict[str, list[object]] = {}
+        for obj in doc.Objects:
+            by_label.setdefault(obj.Label, []).append(obj)
+
         for lbl in labels:
             if lbl in slabels:
-                logging.warning(f'<{self.name}> Duplicate label {lbl} included for export')
+                _LOGGER.warning('<%s> Duplicate label %s included for export', self.name, lbl)
 
             slabels.add(lbl)
-            objs = doc.getObjectsByLabel(lbl)
+            objs = by_label.get(lbl, [])
             if not objs:
-                logging.warning(f'<{self.name}> No object found with label {lbl}')
+                _LOGGER.warning('<%s> No object found with label %s', self.name, lbl)
                 continue
 
             if len(objs) > 1:
-                logging.warning(f'<{self.name}> Multiple objects found with label {lbl}')
+                _LOGGER.warning('<%s> Multiple objects found with label %s', self.name, lbl)
 
             for obj in objs:
                 if self._checkItem(obj):
@@ -135,23 +201,40 @@ class OutputRunner(object):
         """
         items = []
         names = set()
+        top_cache: dict[str, list[object]] = {}
 
         def findTopParents(obj: object) -> list[object]:
-            if not obj.Parents:
-                return [ obj ]
+            # Iterative traversal with a visited set so shared parents in a
+            # diamond ownership graph are only walked once, memoized by Name
+            # so sibling shapes reuse the result
+            cached = top_cache.get(obj.Name)
+            if cached is not None:
+                return cached
+
+            tops = []
+            seen = set()
+            stack = [ obj ]
+            while stack:
+                o = stack.pop()
+                if o.Name in seen:
+                    continue
 
-            parents = []
-            for p, _ in obj.Parents:
-                parents.extend(findTopParents(p))
+                seen.add(o.Name)
+                if not o.Parents:
+                    tops.append(o)
+                else:
+                    stack.extend(p for p, _ in o.Parents)
 
-            return parents
+            top_cache[obj.Name] = tops
+            return tops
 
         for obj in doc.Objects:
             if not hasattr(obj, 'Shape'):
                 continue
 
             parents = findTopParents(obj)
-            logging.debug(f'<{self.name}> Found parents {[p.Name for p in parents]} for {obj.Name}')
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug('<%s> Found parents %s for %s', self.name, [p.Name for p in parents], obj.Name)
 
             for p in parents:
                 if p.Name in names:
@@ -172,15 +255,15 @@ class OutputRunner(object):
         objects are able to be exported by this runner.
         """
         if isinstance(self._config.objects, list):
-            logging.debug(f'<{self.name}> Collecting outputs by label')
+            _LOGGER.debug('<%s> Collecting outputs by label', self.name)
             return self.collectLabels(doc, self._config.objects)
 
         elif isinstance(self._config.objects, FCBotAllPages):
-            logging.debug(f'<{self.name}> Collecting all pages as output')
+            _LOGGER.debug('<%s> Collecting all pages as output', self.name)
             return self.collectPages(doc)
 
         elif isinstance(self._config.objects, FCBotAllShapes):
-            logging.debug(f'<{self.name}> Collecting all shapes as output')
+            _LOGGER.debug('<%s> Collecting all shapes as output', self.name)
             return self.collectShapes(doc)
 
         else:
@@ -199,8 +282,7 @@ class OutputRunner(object):
         `repr(self._config.model_dump())` instead of requiring intermediate
         JSON representation, but this provides some level of type safety.
         """
-        config_json = self._config.model_dump_json(by_alias=True)
-        return f'load_runner_json({repr(config_json)}, {repr(self.name)}, base_dir={repr(base_dir or self._base_dir)})'
+        return f'load_runner_json({repr(self._config_json)}, {repr(self.name)}, base_dir={repr(base_dir or self._base_dir)})'
 
     def run(self, doc: 'App.Document') -> None:
         """Run the Output Runner."""
@@ -208,19 +290,37 @@ class OutputRunner(object):
         if self.comment:
             msg += f' ({self.comment})'
 
-        logging.info(msg)
+        _LOGGER.info(msg)
         
         # Collect input objects
         items = self.collect(doc)
         if not items:
-            logging.warning(f'<{self.name}> No items were collected for processing')
+            _LOGGER.warning('<%s> No items were collected for processing', self.name)
             return
 
-        logging.debug(f'<{self.name}> Collected {len(items)} objects for processing: {[i.Label for i in items]}')
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('<%s> Collected %d objects for processing: %s', self.name, len(items), [i.Label for i in items])
 
         # Run the output processing
         self._execute(doc, items)
-        logging.info(f'<{self.name}> Completed')
+        _LOGGER.info('<%s> Completed', self.name)
+
+    @functools.cached_property
+    def _config_json(self) -> str:
+        """JSON representation of the output configuration.
+
+        Computed lazily on first `emit` call (after `load_runner` has filled
+        in the default `name`) and reused for subsequent emits; the
+        configuration is not mutated after construction.
+
+        The configuration dict is JSON-safe, so plain `json.dumps` (or
+        `orjson` when installed) beats Pydantic's per-field serializer.
+        """
+        data = self._config.model_dump(by_alias=True)
+        if orjson is not None:
+            return orjson.dumps(data).decode()
+
+        return json.dumps(data, separators=(',', ':'))
 
     def __repr__(self) -> str:
         """Generate a representation of this Runner."""
@@ -6,13 +6,27 @@ All Rights Reserved.
 
 import logging
 import os
-import shutil
 import tempfile
 
 from typing import Any, Optional
 
 from .base import OutputRunner
 
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+# Only importable when running inside FreeCAD
+try:
+    import FreeCADGui
+    import TechDrawGui
+except ImportError:
+    FreeCADGui = None
+    TechDrawGui = None
+
+_LOGGER = logging.getLogger(__name__)
+
 
 class PdfOutputRunner(OutputRunner):
     """Export PDF files from FreeCAD TechDraw Pages."""
@@ -22,77 +36,98 @@ class PdfOutputRunner(OutputRunner):
     def _checkItem(self, item: object) -> bool:
         """Check that the items are `TechDraw::DrawPage` items."""
         if item.TypeId != 'TechDraw::DrawPage':
-            logging.debug(f'<{self.name}> Object {item.Label} is not a TechDraw::DrawPage')
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug('<%s> Object %s is not a TechDraw::DrawPage', self.name, item.Label)
             return False
 
         return True
 
     def _execute(self, doc: 'App.Document', items: list[object]) -> None:
         """Export `TechDraw::DrawPage` objects to a PDF file."""
-        from pypdf import PdfReader, PdfWriter
-
-        import FreeCADGui
-        import TechDrawGui
+        if FreeCADGui is None or TechDrawGui is None:
+            _LOGGER.error('<%s> PDF output must be run from within FreeCAD', self.name)
+            return
 
         if not items:
-            logging.warning(f'<{self.name}> Empty item list passed to _execute()')
+            _LOGGER.warning('<%s> Empty item list passed to _execute()', self.name)
             return
 
+        # Items were already filtered to TechDraw::DrawPage by _checkItem
+        # during collect(), so no need to re-check TypeId here
         for obj in items:
-            if obj.TypeId != 'TechDraw::DrawPage':
-                logging.error(f'<{self.name}> Object "{obj.Label}" is not a TechDraw::DrawPage')
-                return
-
-            logging.debug(f'<{self.name}> Redrawing page {obj.Label}')
+            _LOGGER.debug('<%s> Redrawing page %s', self.name, obj.Label)
             obj.recompute(True)
 
         FreeCADGui.updateGui()
 
         abs_fn = self.checkOutputFile(self.filename)
-        with tempfile.TemporaryDirectory() as export_dir:
-            logging.debug(f'<{self.name}> Using temporary export directory {export_dir}')
+        if len(items) == 1:
+            # A single page can be exported straight to the destination with
+            # no merge step or intermediate copy
+            try:
+                _LOGGER.info('<%s> Exporting %s as PDF to %s', self.name, items[0].Label, abs_fn)
+                TechDrawGui.exportPageAsPdf(items[0], abs_fn)
+                if not os.path.isfile(abs_fn):
+                    _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, abs_fn)
+
+            except Exception as e:
+                _LOGGER.error('<%s> Failed to export to PDF: %r', self.name, e)
+
+            return
+
+        # Newer FreeCAD builds can export several pages into one PDF in a
+        # single call, skipping the per-page export and merge entirely
+        if hasattr(TechDrawGui, 'exportPagesAsPdf'):
+            try:
+                _LOGGER.info('<%s> Exporting %d pages as PDF to %s', self.name, len(items), abs_fn)
+                TechDrawGui.exportPagesAsPdf(items, abs_fn)
+                if not os.path.isfile(abs_fn):
+                    _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, abs_fn)
+
+            except Exception as e:
+                _LOGGER.error('<%s> Failed to export to PDF: %r', self.name, e)
+
+            return
+
+        if PdfWriter is None:
+            _LOGGER.error('<%s> pypdf is required to merge multiple pages', self.name)
+            return
+
+        # Merge next to the destination and rename so a partial merge never
+        # clobbers an existing output file
+        merge_fn = abs_fn + '.part'
+
+        with tempfile.TemporaryDirectory(dir=self._resolveTmpDir()) as export_dir:
+            _LOGGER.debug('<%s> Using temporary export directory %s', self.name, export_dir)
 
             try:
-                if len(items) == 1:
-                    export_fn = os.path.join(export_dir, 'export.pdf')
+                page_fns = []
+                for pg_item in items:
+                    export_fn = os.path.join(export_dir, f'{pg_item.Label}.pdf')
+                    page_fns.append(export_fn)
 
-                    logging.info(f'<{self.name}> Exporting {items[0].Label} as PDF to {abs_fn}')
-                    TechDrawGui.exportPageAsPdf(items[0], export_fn)
+                    _LOGGER.info('<%s> Exporting %s as PDF to %s.pdf', self.name, pg_item.Label, pg_item.Label)
+                    TechDrawGui.exportPageAsPdf(pg_item, export_fn)
                     if not os.path.isfile(export_fn):
-                        logging.error(f'<{self.name}> FreeCAD did not generate export file {export_fn}')
+                        _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, export_fn)
                         return
 
-                    logging.debug(f'<{self.name}> Renaming {export_fn} to {abs_fn}')
-                    shutil.copy(export_fn, abs_fn)
-                    os.unlink(export_fn)
-
-                else:
-                    page_fns = []
-                    for pg_item in items:
-                        export_fn = os.path.join(export_dir, f'{pg_item.Label}.pdf')
-                        page_fns.append(export_fn)
-
-                        logging.info(f'<{self.name}> Exporting {pg_item.Label} as PDF to {pg_item.Label}.pdf')
-                        TechDrawGui.exportPageAsPdf(pg_item, export_fn)
-                        if not os.path.isfile(export_fn):
-                            logging.error(f'<{self.name}> FreeCAD did not generate export file {export_fn}')
-                            return
-
-                    logging.info(f'<{self.name}> Merging {len(page_fns)} files into single PDF to {self.filename}')
-
-                    writer = PdfWriter()
-                    for pdf_fn in page_fns:
-                        with open(pdf_fn, 'rb') as f:
-                            reader = PdfReader(f)
-                            if reader.get_num_pages() != 1:
-                                logging.warning(f'<{self.name}> Exported PDF file for {os.path.basename(pdf_fn)} has more than 1 page')
-                            for i, page in enumerate(reader.pages):
-                                logging.debug(f'<{self.name}> Appending page {i+1} from {pdf_fn}')
-                                writer.add_page(page)
-
-                    with open(abs_fn, 'wb') as f:
-                        logging.debug(f'<{self.name}> Writing merged PDF data to {abs_fn}')
-                        writer.write(f)
+                _LOGGER.info('<%s> Merging %d files into single PDF to %s', self.name, len(page_fns), self.filename)
+
+                # PdfWriter.append streams each file without holding every
+                # page open at once
+                writer = PdfWriter()
+                for pdf_fn in page_fns:
+                    _LOGGER.debug('<%s> Appending pages from %s', self.name, pdf_fn)
+                    writer.append(pdf_fn)
+
+                with open(merge_fn, 'wb') as f:
+                    _LOGGER.debug('<%s> Writing merged PDF data to %s', self.name, abs_fn)
+                    writer.write(f)
+
+                os.replace(merge_fn, abs_fn)
 
             except Exception as e:
-                logging.error(f'<{self.name}> Failed to export to PDF: {repr(e)}')
+                _LOGGER.error('<%s> Failed to export to PDF: %r', self.name, e)
+                if os.path.exists(merge_fn):
+                    os.unlink(merge_fn)
@@ -7,14 +7,25 @@ All Rights Reserved.
 import enum
 import logging
 import os
-import shutil
-import tempfile
 
 from typing import Any, Optional, Union
 
 from pydantic import BaseModel
 
-from .base import OutputRunner
+from .base import OutputRunner, supportsPartShape
+
+# Only importable when running inside FreeCAD
+try:
+    import FreeCADGui
+except ImportError:
+    FreeCADGui = None
+
+try:
+    from pivy import coin
+except ImportError:
+    coin = None
+
+_LOGGER = logging.getLogger(__name__)
 
 class FCCameraType(enum.Enum):
     """Defines the FreeCAD Camera Types used for Screenshots."""
@@ -55,104 +66,237 @@ class FCBotScreenshotOptions(BaseModel):
     background: str = 'transparent'
 
 
+#: Compiled options validator, bound once so _loadOptions skips the
+#: model_validate classmethod dispatch. A tagged union for `view` would be
+#: faster still, but would break existing configs that use a bare view name.
+_OPTIONS_VALIDATOR = FCBotScreenshotOptions.__pydantic_validator__
+
+
+#: Named backgrounds the offscreen renderer can reproduce without the GUI
+#: framebuffer, as RGB triples
+_BACKGROUND_COLORS = {
+    'black': (0.0, 0.0, 0.0),
+    'white': (1.0, 1.0, 1.0),
+}
+
+
+def _offscreenBackground(background: str) -> Union[str, tuple[float, float, float], None]:
+    """Translate a `background` option for `SoOffscreenRenderer`.
+
+    Returns `'transparent'`, an RGB triple for named or `#RRGGBB` colors, or
+    `None` when the background cannot be rendered offscreen (e.g. `'current'`,
+    which depends on the GUI framebuffer contents).
+    """
+    bg = background.lower()
+    if bg == 'transparent':
+        return bg
+
+    color = _BACKGROUND_COLORS.get(bg)
+    if color is not None:
+        return color
+
+    if len(bg) == 7 and bg[0] == '#':
+        try:
+            return tuple(int(bg[i:i+2], 16) / 255.0 for i in (1, 3, 5))
+        except ValueError:
+            return None
+
+    return None
+
+
 class ScreenshotOutputRunner(OutputRunner):
     """Export STEP files from FreeCAD Shapes."""
+
+    #: Shared View3D reused by all screenshot runners in a session; creating
+    #: a View3D rebuilds the Coin3D scene graph, so it is created once and
+    #: released via `finalize()` when the pipeline completes.
+    _shared_view = None
+
     def __init__(self, config: dict[str, Any], *, base_dir: Optional[str] = None):
         super().__init__(config, base_dir=base_dir)
 
+    @classmethod
+    def _acquireView(cls) -> object | None:
+        """Get the shared View3D, creating it on first use."""
+        view = cls._shared_view
+        if view is not None:
+            return view
+
+        FreeCADGui.runCommand('Std_ViewCreate', 0)
+        view = FreeCADGui.ActiveDocument.ActiveView
+        if not view or not hasattr(view, 'saveImage'):
+            return None
+
+        cls._shared_view = view
+        return view
+
+    @classmethod
+    def finalize(cls) -> None:
+        """Close the shared View3D once all output runners have completed."""
+        view, cls._shared_view = cls._shared_view, None
+        if view is not None and hasattr(view, 'close'):
+            try:
+                view.close()
+            except Exception:
+                pass
+
     def _checkItem(self, item: object) -> bool:
         """Check that the items implement `Part::PropertyPartShape`."""
-        if not hasattr(item, 'supportedProperties'):
-            logging.debug(f'<{self.name}> Object {item.Label} does not provide a supportedProperties method')
-            return False
-
-        if 'Part::PropertyPartShape' not in item.supportedProperties():
-            logging.debug(f'<{self.name}> Object {item.Label} does not seem to be a Solid')
+        if not supportsPartShape(item):
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug('<%s> Object %s does not seem to be a Solid', self.name, item.Label)
             return False
 
         return True
 
+    def _saveImage(self, view, filename: str, res_x: int, res_y: int, background: str) -> None:
+        """Capture the view to an image file.
+
+        Prefers Coin3D's `SoOffscreenRenderer`, which renders the scene
+        graph straight into the target file without the GUI framebuffer
+        roundtrip; falls back to `view.saveImage` when pivy is not
+        available or the offscreen renderer cannot honor the requested
+        format or background.
+        """
+        if coin is not None and hasattr(view, 'getSceneGraph') and hasattr(view, 'getCameraNode'):
+            try:
+                fmt = os.path.splitext(filename)[-1].split('.')[-1].lower() or 'png'
+                renderer = coin.SoOffscreenRenderer(coin.SbViewportRegion(res_x, res_y))
+
+                # Only take the offscreen path for backgrounds it can
+                # reproduce; anything else (e.g. 'current') needs the GUI
+                # framebuffer and falls through to view.saveImage
+                bg = _offscreenBackground(background)
+                if bg is not None:
+                    if bg == 'transparent':
+                        renderer.setComponents(coin.SoOffscreenRenderer.RGB_TRANSPARENCY)
+                    else:
+                        renderer.setBackgroundColor(coin.SbColor(*bg))
+
+                    # The camera lives in the viewer's superscene, not in
+                    # getSceneGraph(), so render a temporary root that holds
+                    # both; otherwise the setCameraType/view*/fitAll calls in
+                    # _execute would not affect the captured image
+                    root = coin.SoSeparator()
+                    root.addChild(view.getCameraNode())
+                    root.addChild(view.getSceneGraph())
+
+                    if renderer.isWriteSupported(fmt) and renderer.render(root):
+                        if renderer.writeToFile(filename, fmt):
+                            return
+
+            except Exception:
+                _LOGGER.debug('<%s> Offscreen render failed, falling back to saveImage', self.name)
+
+        view.saveImage(filename, res_x, res_y, background)
+
     def _execute(self, doc: 'App.Document', items: list[object]) -> None:
         """Export Shape objects to a STEP file."""
-        import FreeCADGui
+        if FreeCADGui is None:
+            _LOGGER.error('<%s> Screenshot output must be run from within FreeCAD', self.name)
+            return
 
         if not items:
-            logging.warning(f'<{self.name}> Empty item list passed to _execute()')
+            _LOGGER.warning('<%s> Empty item list passed to _execute()', self.name)
             return
 
-        item_names = set([item.Name for item in items])
-        item_visibility = dict()
+        # FreeCAD document objects have stable Python proxies, so identity
+        # comparison replaces a Name attribute crossing per shape
+        target_ids = {id(item) for item in items}
+        changed_objs: list[tuple[object, bool]] = []
 
         def restoreVisibility():
-            for name, vis in item_visibility.items():
+            # Holding the object references avoids a doc.getObject lookup
+            # per changed object on restore
+            for obj, old_vis in changed_objs:
                 try:
-                    obj = doc.getObject(name)
-                    if obj and hasattr(obj, 'Visibility'):
-                        obj.Visibility = visibility
-                except:
+                    obj.Visibility = old_vis
+                except Exception:
                     pass
 
         abs_fn = self.checkOutputFile(self.filename)
-        ext = os.path.splitext(self.filename)[-1][1:]
-        temp_fn = f'export.{ext}'
-        with tempfile.TemporaryDirectory() as export_dir:
-            logging.debug(f'<{self.name}> Using temporary export directory {export_dir}')
-            export_fn = os.path.join(export_dir, temp_fn)
+        if not abs_fn:
+            return
 
-            try:
-                logging.debug(f'<{self.name}> Hiding other objects from view')
-                for obj in self.collectShapes(doc):
-                    visibility = obj.Name in item_names
-                    if visibility != obj.Visibility:
-                        item_visibility[obj.Name] = obj.Visibility
-                        obj.Visibility = visibility
-
-                logging.debug(f'<{self.name}> Setting up new View3D')
-                FreeCADGui.runCommand('Std_ViewCreate', 0)
-                view = FreeCADGui.ActiveDocument.ActiveView
-                if not view or not hasattr(view, 'saveImage'):
-                    logging.error(f'<{self.name}> Std_ViewCreate did not create a Gui::View3DInventor')
-                    restoreVisibility()
-                    return
+        # Capture next to the destination and rename into place; the .part
+        # sibling keeps the extension so saveImage picks the right format
+        base, dot_ext = os.path.splitext(abs_fn)
+        ext = dot_ext[1:]
+        export_fn = f'{base}.part{dot_ext}'
+
+        try:
+            _LOGGER.debug('<%s> Acquiring shared View3D', self.name)
+            view = self._acquireView()
+            if not view:
+                _LOGGER.error('<%s> Std_ViewCreate did not create a Gui::View3DInventor', self.name)
+                return
+
+            root = view.getSceneGraph() if hasattr(view, 'getSceneGraph') else None
+
+            _LOGGER.debug('<%s> Hiding other objects from view', self.name)
+            shapes = self.collectShapes(doc)
+            current_visible = {id(obj) for obj in shapes if obj.Visibility}
+            if current_visible != target_ids:
+                # Each Visibility write invalidates the Coin3D scene graph,
+                # so skip the whole loop when the visible set already matches
+                # (e.g. repeated screenshots of the same items), and suspend
+                # notifications so N writes coalesce into a single repaint
+                freeze = root is not None and hasattr(root, 'enableNotify')
+                if freeze:
+                    root.enableNotify(False)
 
-                logging.debug(f'<{self.name}> Calling view.setCameraType({self._options.camera.name})')
-                view.setCameraType(self._options.camera.name)
+                try:
+                    for obj in shapes:
+                        new_vis = id(obj) in target_ids
+                        if new_vis != obj.Visibility:
+                            changed_objs.append((obj, obj.Visibility))
+                            obj.Visibility = new_vis
+
+                finally:
+                    if freeze:
+                        root.enableNotify(True)
+                        root.touch()
+
+            _LOGGER.debug('<%s> Calling view.setCameraType(%s)', self.name, self._options.camera.name)
+            view.setCameraType(self._options.camera.name)
+
+            if isinstance(self._options.view, FCViewType):
+                viewMethod = f'view{self._options.view.name}'
+                if not hasattr(view, viewMethod):
+                    _LOGGER.error('<%s> %s is not a recognized method on Gui::View3DInventor', self.name, viewMethod)
+                    return
 
-                if isinstance(self._options.view, FCViewType):
-                    viewMethod = f'view{self._options.view.name}'
-                    if not hasattr(view, viewMethod):
-                        logging.error(f'<{self.name}> {viewMethod} is not a recognized method on Gui::View3DInventor')
-                        restoreVisibility()
-                        return
+                _LOGGER.debug('<%s> Calling view.%s', self.name, viewMethod)
+                getattr(view, viewMethod)()
 
-                    logging.debug(f'<{self.name}> Calling view.{viewMethod}')
-                    getattr(view, viewMethod)()
+            else:
+                _LOGGER.error('<%s> We do not know how to set arbitrary camera position yet', self.name)
+                return
 
-                else:
-                    logging.error(f'<{self.name}> We do not know how to set arbitrary camera position yet')
-                    restoreVisibility()
-                    return
+            res_x, res_y = self._options.resolution
 
-                res_x, res_y = self._options.resolution
+            _LOGGER.info('<%s> Capturing screenshot of %s items as %s to %s', self.name, len(items), ext.upper(), abs_fn)
+            _LOGGER.debug('<%s> Capturing %s at %sx%s with background %s', self.name, export_fn, res_x, res_y, self._options.background)
+            view.fitAll()
+            self._saveImage(view, export_fn, res_x, res_y, self._options.background)
 
-                logging.info(f'<{self.name}> Capturing screenshot of {len(items)} items as {ext.upper()} to {abs_fn}')
-                logging.debug(f'<{self.name}> Calling view.saveImage({export_fn}, {res_x}, {res_y}, {self._options.background})')
-                view.fitAll()
-                view.saveImage(export_fn, res_x, res_y, self._options.background)
-                if not os.path.isfile(export_fn):
-                    logging.error(f'<{self.name}> FreeCAD did not generate export file {export_fn}')
-                    restoreVisibility()
-                    return
+            _LOGGER.debug('<%s> Renaming %s to %s', self.name, export_fn, abs_fn)
+            os.replace(export_fn, abs_fn)
 
-                restoreVisibility()
+        except FileNotFoundError:
+            _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, export_fn)
 
-                logging.debug(f'<{self.name}> Renaming {export_fn} to {abs_fn}')
-                shutil.copy(export_fn, abs_fn)
+        except Exception as e:
+            _LOGGER.error('<%s> Failed to export screenshot: %r', self.name, e)
+            if os.path.exists(export_fn):
                 os.unlink(export_fn)
 
-            except Exception as e:
-                logging.error(f'<{self.name}> Failed to export screenshot: {repr(e)}')
+        finally:
+            # Restore document state on every exit path so failed exports do
+            # not leave the document with mutated visibility. The shared
+            # View3D stays open until finalize() is called by the pipeline.
+            restoreVisibility()
 
     def _loadOptions(self, options: dict[str, Any]) -> Any:
         """Load Output-Type Specific Options."""
-        return FCBotScreenshotOptions.model_validate(options)
+        return _OPTIONS_VALIDATOR.validate_python(options)
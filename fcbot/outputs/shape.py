@@ -6,68 +6,84 @@ All Rights Reserved.
 
 import logging
 import os
-import shutil
-import tempfile
 
 from typing import Any, Optional
 
-from .base import OutputRunner
+from .base import OutputRunner, supportsPartShape
+
+# Only importable when running inside FreeCAD
+try:
+    import Import
+except ImportError:
+    Import = None
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class StepOutputRunner(OutputRunner):
     """Export STEP files from FreeCAD Shapes."""
+    #: OCCT topology serialization releases the GIL and does not touch the GUI
+    parallel_safe = True
+
     def __init__(self, config: dict[str, Any], *, base_dir: Optional[str] = None):
         super().__init__(config, base_dir=base_dir)
 
     def _checkItem(self, item: object) -> bool:
         """Check that the items implement `Part::PropertyPartShape`."""
-        if not hasattr(item, 'supportedProperties'):
-            logging.debug(f'<{self.name}> Object {item.Label} does not provide a supportedProperties method')
-            return False
-
-        if 'Part::PropertyPartShape' not in item.supportedProperties():
-            logging.debug(f'<{self.name}> Object {item.Label} does not seem to be a Solid')
+        if not supportsPartShape(item):
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug('<%s> Object %s does not seem to be a Solid', self.name, item.Label)
             return False
 
         return True
 
     def _execute(self, doc: 'App.Document', items: list[object]) -> None:
         """Export Shape objects to a STEP file."""
-        import Import
+        if Import is None:
+            _LOGGER.error('<%s> STEP output must be run from within FreeCAD', self.name)
+            return
 
         if not items:
-            logging.warning(f'<{self.name}> Empty item list passed to _execute()')
+            _LOGGER.warning('<%s> Empty item list passed to _execute()', self.name)
             return
 
         abs_fn = self.checkOutputFile(self.filename)
-        with tempfile.TemporaryDirectory() as export_dir:
-            logging.debug(f'<{self.name}> Using temporary export directory {export_dir}')
-            export_fn = os.path.join(export_dir, f'export.step')
-
-            try:
-                logging.info(f'<{self.name}> Exporting {len(items)} items as STEP to {abs_fn}')
-                Import.export(items, export_fn)
-                if not os.path.isfile(export_fn):
-                    logging.error(f'<{self.name}> FreeCAD did not generate export file {export_fn}')
-                    return
-
-                logging.debug(f'<{self.name}> Renaming {export_fn} to {abs_fn}')
-                shutil.copy(export_fn, abs_fn)
-                os.unlink(export_fn)
+        if not abs_fn:
+            return
 
-            except Exception as e:
-                logging.error(f'<{self.name}> Failed to export to STEP: {repr(e)}')
+        # Export next to the destination and rename into place; the .part
+        # sibling keeps the extension so FreeCAD picks the right exporter
+        base, ext = os.path.splitext(abs_fn)
+        export_fn = f'{base}.part{ext}'
+
+        try:
+            _LOGGER.info('<%s> Exporting %s items as STEP to %s', self.name, len(items), abs_fn)
+            Import.export(items, export_fn)
+            _LOGGER.debug('<%s> Renaming %s to %s', self.name, export_fn, abs_fn)
+            os.replace(export_fn, abs_fn)
+
+        except FileNotFoundError:
+            _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, export_fn)
+
+        except Exception as e:
+            _LOGGER.error('<%s> Failed to export to STEP: %r', self.name, e)
+            if os.path.exists(export_fn):
+                os.unlink(export_fn)
 
 
 class StlOutputRunner(OutputRunner):
     """Export STL files from FreeCAD Shapes."""
+    #: Mesh tessellation and STL writing release the GIL like STEP export
+    parallel_safe = True
+
     def __init__(self, config: dict[str, Any], *, base_dir: Optional[str] = None):
         super().__init__(config, base_dir=base_dir)
 
     def _checkItem(self, item: object) -> bool:
         """Check that the items provide a `Shape` property."""
         if not hasattr(item, 'Shape'):
-            logging.debug(f'<{self.name}> Object {item.Label} does not have a Shape property')
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug('<%s> Object %s does not have a Shape property', self.name, item.Label)
             return False
 
         return True
@@ -75,28 +91,30 @@ class StlOutputRunner(OutputRunner):
     def _execute(self, doc: 'App.Document', items: list[object]) -> None:
         """Export Shape objects to a STL file."""
         if not items:
-            logging.warning(f'<{self.name}> Empty item list passed to _execute()')
+            _LOGGER.warning('<%s> Empty item list passed to _execute()', self.name)
             return
 
         if len(items) > 1:
-            logging.error(f'<{self.name}> Only one object may be output to STL at a time')
+            _LOGGER.error('<%s> Only one object may be output to STL at a time', self.name)
             return
 
         abs_fn = self.checkOutputFile(self.filename)
-        with tempfile.TemporaryDirectory() as export_dir:
-            logging.debug(f'<{self.name}> Using temporary export directory {export_dir}')
-            export_fn = os.path.join(export_dir, f'export.stl')
-
-            try:
-                logging.info(f'<{self.name}> Exporting {len(items)} items as STL to {abs_fn}')
-                items[0].Shape.exportStl(export_fn)
-                if not os.path.isfile(export_fn):
-                    logging.error(f'<{self.name}> FreeCAD did not generate export file {export_fn}')
-                    return
-
-                logging.debug(f'<{self.name}> Renaming {export_fn} to {abs_fn}')
-                shutil.copy(export_fn, abs_fn)
-                os.unlink(export_fn)
+        if not abs_fn:
+            return
 
-            except Exception as e:
-                logging.error(f'<{self.name}> Failed to export to STL: {repr(e)}')
+        base, ext = os.path.splitext(abs_fn)
+        export_fn = f'{base}.part{ext}'
+
+        try:
+            _LOGGER.info('<%s> Exporting %s items as STL to %s', self.name, len(items), abs_fn)
+            items[0].Shape.exportStl(export_fn)
+            _LOGGER.debug('<%s> Renaming %s to %s', self.name, export_fn, abs_fn)
+            os.replace(export_fn, abs_fn)
+
+        except FileNotFoundError:
+            _LOGGER.error('<%s> FreeCAD did not generate export file %s', self.name, export_fn)
+
+        except Exception as e:
+            _LOGGER.error('<%s> Failed to export to STL: %r', self.name, e)
+            if os.path.exists(export_fn):
+                os.unlink(export_fn)